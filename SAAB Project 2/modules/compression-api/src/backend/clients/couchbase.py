@@ -2,8 +2,10 @@ import uuid
 import logging
 import asyncio
 import time
-from datetime import timedelta
-from typing import Optional, Dict, Any, List, Union
+from datetime import date, timedelta
+from enum import Enum
+from types import NoneType, UnionType
+from typing import Optional, Dict, Any, List, Union, get_args, get_origin
 from dataclasses import dataclass
 
 from couchbase.auth import PasswordAuthenticator
@@ -24,6 +26,52 @@ from couchbase.management.buckets import CreateBucketSettings, BucketType
 logger = logging.getLogger(__name__)
 
 
+def to_json_value(value: Any) -> Any:
+    """
+    Convert a UUID, date/datetime or Enum value (or a list of them) into a JSON-compatible value.
+
+    A cheaper alternative to model_dump(mode='json') for the few fields of a
+    document that actually need converting.
+    """
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, list):
+        return [to_json_value(item) for item in value]
+    return value
+
+
+# Field types that are stored as-is; anything else goes through to_json_value
+_JSON_NATIVE_TYPES = (str, int, float, bool, NoneType)
+
+
+def _is_json_native(annotation: Any) -> bool:
+    """Whether values of a field annotation are already JSON-compatible."""
+    if get_origin(annotation) in (Union, UnionType):
+        return all(_is_json_native(arg) for arg in get_args(annotation))
+    return annotation in _JSON_NATIVE_TYPES
+
+
+def json_fields(model: type) -> tuple[str, ...]:
+    """Names of a pydantic model's fields whose values need to_json_value when dumping to JSON."""
+    return tuple(name for name, field in model.model_fields.items() if not _is_json_native(field.annotation))
+
+
+def dump_doc(doc: Any, fields: tuple[str, ...]) -> Dict[str, Any]:
+    """
+    Dump a pydantic model to a JSON-compatible dict, converting only the given fields.
+
+    Pass the model's json_fields(); the remaining fields are stored as-is.
+    """
+    data = doc.__dict__.copy()
+    for key in fields:
+        data[key] = to_json_value(data[key])
+    return data
+
+
 @dataclass
 class CouchbaseConf:
     """Couchbase configuration"""
@@ -192,6 +240,23 @@ class CouchbaseClient:
         except DocumentNotFoundException:
             return None
 
+    async def get_documents(self, collection, keys: List[str],
+                            batch_size: int = 50) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get many documents by key, pipelining them in batches of batch_size; missing keys map to None.
+
+        Takes a collection handle, like upsert_documents.
+        """
+        documents = {}
+        for i in range(0, len(keys), batch_size):
+            result = collection.get_multi(keys[i:i + batch_size])
+            for key, error in result.exceptions.items():
+                if not isinstance(error, DocumentNotFoundException):
+                    raise error
+            for key, get_result in result.results.items():
+                documents[key] = get_result.content_as[dict]
+        return {key: documents.get(key) for key in keys}
+
     async def update_document(self, keyspace: Keyspace, key: str, document: Dict[str, Any]) -> bool:
         """Update a document by key"""
         try:
@@ -211,6 +276,21 @@ class CouchbaseClient:
         collection.upsert(key, document)
         return key
 
+    async def upsert_documents(self, collection, documents: Dict[str, Dict[str, Any]],
+                               batch_size: int = 50) -> List[str]:
+        """
+        Insert or update many documents, pipelining them in batches of batch_size.
+
+        Takes a collection handle rather than a keyspace so callers can pass one
+        they've cached, instead of re-running the get_collection checks per call.
+        """
+        items = list(documents.items())
+        for i in range(0, len(items), batch_size):
+            result = collection.upsert_multi(dict(items[i:i + batch_size]))
+            if not result.all_ok:
+                raise next(iter(result.exceptions.values()))
+        return list(documents)
+
     async def delete_document(self, keyspace: Keyspace, key: str) -> bool:
         """Delete a document by key"""
         try:
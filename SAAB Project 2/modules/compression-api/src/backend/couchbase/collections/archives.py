@@ -2,13 +2,16 @@
 Bindings for working with the 'archives' collection.
 """
 
+import asyncio
 from datetime import datetime
 from enum import Enum
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from uuid import UUID
 
-from ...clients.couchbase import CouchbaseClient
+from couchbase.exceptions import DocumentNotFoundException
+
+from ...clients.couchbase import CouchbaseClient, dump_doc, json_fields
 
 
 # The type used for keys in this collection.
@@ -38,6 +41,9 @@ class ArchivesDoc(BaseModel):
     download_url: Optional[str] = None  # URL for downloading the archive
 
 
+_JSON_FIELDS = json_fields(ArchivesDoc)
+
+
 class ListParams(BaseModel):
     """Supported parameters for archives list operations."""
     # Add more params here as needed
@@ -51,14 +57,18 @@ class ArchivesCollection:
     def __init__(self, client: CouchbaseClient):
         self._client = client
         self._collection = None
+        self._keyspace = client.get_keyspace(_COLLECTION_NAME)
+        self._init_lock = asyncio.Lock()
 
     ## Utils ##
 
     async def _get_collection(self):
         """Get the collection handle, creating it if necessary."""
         if not self._collection:
-            keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-            self._collection = await self._client.get_collection(keyspace)
+            # Concurrent first callers wait for a single lookup
+            async with self._init_lock:
+                if not self._collection:
+                    self._collection = await self._client.get_collection(self._keyspace)
         return self._collection
 
     ## Initialization ##
@@ -71,9 +81,11 @@ class ArchivesCollection:
 
     async def _get_doc(self, id: _KEY_TYPE) -> dict | None:
         """Retrieves a archives doc as a plain dict."""
-        await self._get_collection()
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        return await self._client.get_document(keyspace, str(id))
+        collection = await self._get_collection()
+        try:
+            return collection.get(str(id)).content_as[dict]
+        except DocumentNotFoundException:
+            return None
 
     async def get(self, id: _KEY_TYPE) -> ArchivesDoc | None:
         """Retrieves a archives doc as a ArchivesDoc."""
@@ -86,8 +98,7 @@ class ArchivesCollection:
     async def _list_rows(self, params: ListParams | None = None) -> list[dict]:
         """Retrieves archives docs as a list of plain dicts."""
         params = params or ListParams()
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        query = self._client.build_list_query(keyspace, limit=params.limit, offset=params.offset)
+        query = self._client.build_list_query(self._keyspace, limit=params.limit, offset=params.offset)
         return await self._client.query_documents(query)
 
     async def list(self, params: ListParams | None = None) -> list[ArchivesDoc]:
@@ -97,11 +108,15 @@ class ArchivesCollection:
 
     async def delete(self, id: _KEY_TYPE) -> bool:
         """Delete a archives doc."""
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        return await self._client.delete_document(keyspace, str(id))
+        collection = await self._get_collection()
+        try:
+            collection.remove(str(id))
+        except DocumentNotFoundException:
+            return False
+        return True
 
     async def upsert(self, doc: ArchivesDoc) -> ArchivesDoc:
         """Insert or update a archives doc."""
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        await self._client.upsert_document(keyspace, str(doc.id), doc.model_dump(mode='json'))
+        collection = await self._get_collection()
+        collection.upsert(str(doc.id), dump_doc(doc, _JSON_FIELDS))
         return doc
@@ -2,13 +2,16 @@
 Bindings for working with the 'files' collection.
 """
 
+import asyncio
 from datetime import datetime
 from enum import Enum
 from pydantic import BaseModel, Field
 from typing import Optional
 from uuid import UUID
 
-from ...clients.couchbase import CouchbaseClient
+from couchbase.exceptions import DocumentNotFoundException
+
+from ...clients.couchbase import CouchbaseClient, dump_doc, json_fields
 
 
 # The type used for keys in this collection.
@@ -20,6 +23,8 @@ _COLLECTION_NAME = "files"
 
 class FileState(str, Enum):
     """File processing states."""
+    # No longer set now that uploads stream straight into the archive, but
+    # kept so docs written by earlier versions still load
     UPLOADED = "uploaded"
     PROCESSING = "processing"
     ARCHIVED = "archived"
@@ -34,8 +39,10 @@ class FilesDoc(BaseModel):
     content_type: Optional[str] = None
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
     archive_id: Optional[UUID] = None
-    state: FileState = FileState.UPLOADED
-    file_path: Optional[str] = None  # Temporary storage path
+    state: FileState = FileState.ARCHIVED
+
+
+_JSON_FIELDS = json_fields(FilesDoc)
 
 
 class ListParams(BaseModel):
@@ -51,14 +58,18 @@ class FilesCollection:
     def __init__(self, client: CouchbaseClient):
         self._client = client
         self._collection = None
+        self._keyspace = client.get_keyspace(_COLLECTION_NAME)
+        self._init_lock = asyncio.Lock()
 
     ## Utils ##
 
     async def _get_collection(self):
         """Get the collection handle, creating it if necessary."""
         if not self._collection:
-            keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-            self._collection = await self._client.get_collection(keyspace)
+            # Concurrent first callers wait for a single lookup
+            async with self._init_lock:
+                if not self._collection:
+                    self._collection = await self._client.get_collection(self._keyspace)
         return self._collection
 
     ## Initialization ##
@@ -71,9 +82,11 @@ class FilesCollection:
 
     async def _get_doc(self, id: _KEY_TYPE) -> dict | None:
         """Retrieves a files doc as a plain dict."""
-        await self._get_collection()
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        return await self._client.get_document(keyspace, str(id))
+        collection = await self._get_collection()
+        try:
+            return collection.get(str(id)).content_as[dict]
+        except DocumentNotFoundException:
+            return None
 
     async def get(self, id: _KEY_TYPE) -> FilesDoc | None:
         """Retrieves a files doc as a FilesDoc."""
@@ -86,8 +99,7 @@ class FilesCollection:
     async def _list_rows(self, params: ListParams | None = None) -> list[dict]:
         """Retrieves files docs as a list of plain dicts."""
         params = params or ListParams()
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        query = self._client.build_list_query(keyspace, limit=params.limit, offset=params.offset)
+        query = self._client.build_list_query(self._keyspace, limit=params.limit, offset=params.offset)
         return await self._client.query_documents(query)
 
     async def list(self, params: ListParams | None = None) -> list[FilesDoc]:
@@ -97,11 +109,21 @@ class FilesCollection:
 
     async def delete(self, id: _KEY_TYPE) -> bool:
         """Delete a files doc."""
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        return await self._client.delete_document(keyspace, str(id))
+        collection = await self._get_collection()
+        try:
+            collection.remove(str(id))
+        except DocumentNotFoundException:
+            return False
+        return True
 
     async def upsert(self, doc: FilesDoc) -> FilesDoc:
         """Insert or update a files doc."""
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        await self._client.upsert_document(keyspace, str(doc.id), doc.model_dump(mode='json'))
+        collection = await self._get_collection()
+        collection.upsert(str(doc.id), dump_doc(doc, _JSON_FIELDS))
         return doc
+
+    async def upsert_many(self, docs: list[FilesDoc]) -> list[FilesDoc]:
+        """Insert or update several files docs in batched round-trips."""
+        collection = await self._get_collection()
+        await self._client.upsert_documents(collection, {str(doc.id): dump_doc(doc, _JSON_FIELDS) for doc in docs})
+        return docs
@@ -2,6 +2,7 @@ import uvicorn
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from .utils import log
 from .routes.base import router
 from .routes.compression import router as compression_router
@@ -35,10 +36,14 @@ async def lifespan(app: FastAPI):
         app.state.couchbase_client = CouchbaseClient(couchbase_config)
         await app.state.couchbase_client.init_connection()
 
-        # Import and initialize all Couchbase collections
+        # Import and initialize all Couchbase collections, keeping one shared
+        # instance of each so routes and activities don't rebuild them per call
         from .couchbase.collections import COLLECTIONS
+        app.state.couchbase_collections = {}
         for Collection in COLLECTIONS:
-            await Collection(app.state.couchbase_client).initialize()
+            collection = Collection(app.state.couchbase_client)
+            await collection.initialize()
+            app.state.couchbase_collections[Collection] = collection
 
 
     # Initialize auth client if enabled
@@ -92,6 +97,7 @@ app = FastAPI(
     docs_url="/docs",
     lifespan=lifespan,
     debug=conf.get_http_expose_errors(),
+    default_response_class=ORJSONResponse,
 )
 
 app.include_router(router)
@@ -116,6 +122,7 @@ def main() -> None:
         host=http_conf.host,
         port=http_conf.port,
         reload=http_conf.autoreload,
+        loop="uvloop",  # Installed by uvicorn[standard]; fail loudly rather than fall back to asyncio
         log_level="info",
         log_config=None
     )
@@ -6,12 +6,17 @@ import asyncio
 import os
 import shutil
 import tarfile
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Awaitable, Callable, List, Optional
+from cachetools import TTLCache
 from fastapi import APIRouter, File, UploadFile, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
+import zstandard as zstd
 
 from ..utils import log
 from ..couchbase.collections.files import FilesCollection, FilesDoc, FileState, ListParams as FileListParams
@@ -21,11 +26,37 @@ logger = log.get_logger(__name__)
 router = APIRouter()
 
 # Storage configuration
-UPLOAD_DIR = Path("/tmp/compression-uploads")
 ARCHIVE_DIR = Path("/tmp/compression-archives")
 
+# Uploads are streamed into the archive in chunks of this size
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+# Thread pool for archive writes in the zstandard fallback, so compression and
+# writes that block on a slow or full disk never run on the event loop
+IO_EXECUTOR = ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 1) * 4),
+    thread_name_prefix="compression-io"
+)
+
+# zstd level 3 is zstd's default: much faster than gzip at a similar ratio
+ZSTD_LEVEL = 3
+
+# Idle zstandard compressors, reused across archives instead of allocating a
+# new compression context each time. A compressor is not thread-safe and
+# drives one stream at a time, so each archive holds one for its lifetime.
+# Each keeps its own pool of worker threads, so only a few are kept idle and
+# any past MAX_IDLE_COMPRESSORS are dropped once their archive is done.
+MAX_IDLE_COMPRESSORS = 4
+_idle_compressors: list[zstd.ZstdCompressor] = []
+
+# List responses are cached briefly so bursts of polling don't each query Couchbase
+LIST_CACHE_SIZE = 128
+LIST_CACHE_TTL = 2  # seconds
+_list_cache: TTLCache = TTLCache(maxsize=LIST_CACHE_SIZE, ttl=LIST_CACHE_TTL)
+# In-flight loads by cache key, so concurrent misses for the same page share one query
+_list_loads: dict[tuple, asyncio.Task] = {}
+
 # Ensure directories exist
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
 
 
@@ -82,96 +113,157 @@ class ArchiveDetailResponse(BaseModel):
 
 def get_collections(request: Request) -> tuple[FilesCollection, ArchivesCollection]:
     """Get collection instances from app state."""
-    couchbase_client = request.app.state.couchbase_client
-    files_collection = FilesCollection(couchbase_client)
-    archives_collection = ArchivesCollection(couchbase_client)
-    return files_collection, archives_collection
+    collections = request.app.state.couchbase_collections
+    return collections[FilesCollection], collections[ArchivesCollection]
 
 
-async def compress_files(archive_id: uuid.UUID, files: List[FilesDoc]) -> tuple[str, int]:
-    """
-    Compress multiple files into a tar.gz archive.
-    Returns the archive path and total size.
-    """
-    archive_filename = f"archive-{archive_id}.tar.gz"
-    archive_path = ARCHIVE_DIR / archive_filename
-    
-    # Create tar.gz archive
-    with tarfile.open(archive_path, "w:gz") as tar:
-        for file_doc in files:
-            if file_doc.file_path and Path(file_doc.file_path).exists():
-                tar.add(file_doc.file_path, arcname=file_doc.filename)
-    
-    # Get archive size
-    archive_size = archive_path.stat().st_size
-    
-    return str(archive_path), archive_size
+async def _cached_list(key: tuple, load: Callable[[], Awaitable[list]]) -> list:
+    """Return a list response from the cache, loading and caching it on a miss."""
+    if (cached := _list_cache.get(key)) is not None:
+        return cached
 
+    if (task := _list_loads.get(key)) is None:
+        task = asyncio.create_task(load())
+        _list_loads[key] = task
 
-async def cleanup_files(files: List[FilesDoc]):
-    """Delete temporary uploaded files."""
-    for file_doc in files:
-        if file_doc.file_path:
-            try:
-                Path(file_doc.file_path).unlink(missing_ok=True)
-            except Exception as e:
-                logger.error(f"Failed to delete file {file_doc.file_path}: {e}")
+        def store(done: asyncio.Task):
+            # Skip loads superseded by an invalidation while they were running
+            if _list_loads.get(key) is done:
+                del _list_loads[key]
+                if not done.cancelled() and done.exception() is None:
+                    _list_cache[key] = done.result()
 
+        task.add_done_callback(store)
 
-async def process_archive(archive_id: uuid.UUID, files_collection: FilesCollection, archives_collection: ArchivesCollection):
-    """Background task to compress files and update archive status."""
-    try:
-        # Get archive
-        archive = await archives_collection.get(archive_id)
-        if not archive:
-            logger.error(f"Archive {archive_id} not found")
-            return
-        
-        # Update archive state to processing
-        archive.state = ArchiveState.PROCESSING
-        await archives_collection.upsert(archive)
-        
-        # Get all files for this archive
-        files = []
-        for file_id in archive.file_ids:
-            file_doc = await files_collection.get(file_id)
-            if file_doc:
-                files.append(file_doc)
-                # Update file state
-                file_doc.state = FileState.PROCESSING
-                await files_collection.upsert(file_doc)
-        
-        # Compress files
-        archive_path, archive_size = await compress_files(archive_id, files)
-        
-        # Update archive with results
-        archive.state = ArchiveState.COMPLETED
-        archive.archive_path = archive_path
-        archive.total_size = archive_size
-        archive.completed_at = datetime.utcnow()
-        archive.download_url = f"/archives/{archive_id}/download"
-        await archives_collection.upsert(archive)
-        
-        # Update all files to archived state
-        for file_doc in files:
-            file_doc.state = FileState.ARCHIVED
-            await files_collection.upsert(file_doc)
-        
-        # Cleanup original uploaded files
-        await cleanup_files(files)
-        
-        logger.info(f"Archive {archive_id} completed successfully")
-        
-    except Exception as e:
-        logger.error(f"Failed to process archive {archive_id}: {e}")
-        # Update archive state to failed
+    # Shielded so one waiter disconnecting doesn't cancel the load for the others
+    return await asyncio.shield(task)
+
+
+def _invalidate_lists():
+    """Drop cached and in-flight list responses after a write."""
+    _list_cache.clear()
+    _list_loads.clear()
+
+
+def _unique_arcname(filename: Optional[str], taken: set[str]) -> str:
+    """Pick the name of an upload inside its archive, suffixing duplicates as 'name (1).ext'."""
+    name = Path(filename or "").name or "file"
+    arcname = name
+    counter = 1
+    while arcname in taken:
+        arcname = f"{Path(name).stem} ({counter}){Path(name).suffix}"
+        counter += 1
+    taken.add(arcname)
+    return arcname
+
+
+def _upload_size(upload_file: UploadFile) -> int:
+    """Size of an upload; Starlette sets it while parsing, otherwise measure the spooled file."""
+    if upload_file.size is not None:
+        return upload_file.size
+    upload_file.file.seek(0, os.SEEK_END)
+    size = upload_file.file.tell()
+    upload_file.file.seek(0)
+    return size
+
+
+class ArchiveWriter:
+    """
+    Streams uploads into a tar.zst archive as they are read, so they are
+    never staged on disk and re-read for compression.
+
+    Pipes the tar stream through the zstd binary when available and through
+    the zstandard module otherwise.
+    """
+
+    def __init__(self, archive_path: Path):
+        self.archive_path = archive_path
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._cctx: Optional[zstd.ZstdCompressor] = None
+        self._compressor = None
+        self._offset = 0
+
+    async def open(self):
+        """Start the compressor writing to the archive path."""
+        if shutil.which("zstd"):
+            self._proc = await asyncio.create_subprocess_exec(
+                "zstd", f"-{ZSTD_LEVEL}", "-T0", "-q", "-f", "-o", str(self.archive_path),
+                stdin=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        else:
+            if _idle_compressors:
+                self._cctx = _idle_compressors.pop()
+            else:
+                self._cctx = zstd.ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+            self._compressor = self._cctx.stream_writer(open(self.archive_path, "wb"))
+
+    async def _write(self, data: bytes):
+        self._offset += len(data)
+        if self._proc:
+            self._proc.stdin.write(data)
+            await self._proc.stdin.drain()
+        else:
+            await asyncio.get_running_loop().run_in_executor(IO_EXECUTOR, self._compressor.write, data)
+
+    async def add_file(self, arcname: str, upload_file: UploadFile) -> int:
+        """Append an upload as an archive member. Returns the number of bytes added."""
+        info = tarfile.TarInfo(arcname)
+        info.size = _upload_size(upload_file)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        await self._write(info.tobuf(tarfile.PAX_FORMAT))
+
+        written = 0
+        while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+            await self._write(chunk)
+            written += len(chunk)
+        if written != info.size:
+            raise RuntimeError(f"Upload {arcname!r} was {written} bytes, expected {info.size}")
+
+        # Members are padded to a whole number of blocks
+        remainder = written % tarfile.BLOCKSIZE
+        if remainder:
+            await self._write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+        return written
+
+    async def close(self) -> int:
+        """Write the end-of-archive marker and finish compression. Returns the archive size."""
+        trailer_size = 2 * tarfile.BLOCKSIZE
+        remainder = (self._offset + trailer_size) % tarfile.RECORDSIZE
+        if remainder:
+            trailer_size += tarfile.RECORDSIZE - remainder
+        trailer = tarfile.NUL * trailer_size
+
+        if self._proc:
+            _, stderr = await self._proc.communicate(trailer)
+            if self._proc.returncode != 0:
+                raise RuntimeError(
+                    f"zstd exited with code {self._proc.returncode}: {stderr.decode(errors='replace').strip()}"
+                )
+        else:
+            await self._write(trailer)
+            await asyncio.get_running_loop().run_in_executor(IO_EXECUTOR, self._compressor.close)
+            if len(_idle_compressors) < MAX_IDLE_COMPRESSORS:
+                _idle_compressors.append(self._cctx)
+        return self.archive_path.stat().st_size
+
+    async def abort(self):
+        """Stop the compressor and remove the partial archive."""
         try:
-            archive = await archives_collection.get(archive_id)
-            if archive:
-                archive.state = ArchiveState.FAILED
-                await archives_collection.upsert(archive)
-        except Exception as update_error:
-            logger.error(f"Failed to update archive state: {update_error}")
+            if self._proc and self._proc.returncode is None:
+                try:
+                    self._proc.kill()
+                except ProcessLookupError:
+                    pass  # zstd already exited, e.g. after a broken pipe
+                await self._proc.wait()
+            elif self._compressor and not self._compressor.closed:
+                # Drop the compressor rather than return a half-used one to the pool
+                await asyncio.get_running_loop().run_in_executor(IO_EXECUTOR, self._compressor.close)
+        except Exception as e:
+            logger.warning(f"Failed to stop compressor for {self.archive_path}: {e}")
+        finally:
+            self.archive_path.unlink(missing_ok=True)
 
 
 #### Routes ####
@@ -179,7 +271,7 @@ async def process_archive(archive_id: uuid.UUID, files_collection: FilesCollecti
 @router.post("/files", response_model=FileUploadResponse)
 async def upload_files(request: Request, files: List[UploadFile] = File(...)):
     """
-    Upload one or more files for compression.
+    Upload one or more files and compress them into an archive.
     Returns an archive ID that can be used to check status and download.
     """
     if not files:
@@ -191,51 +283,55 @@ async def upload_files(request: Request, files: List[UploadFile] = File(...)):
     archive_id = uuid.uuid4()
     archive = ArchivesDoc(
         id=archive_id,
-        state=ArchiveState.PENDING,
+        state=ArchiveState.PROCESSING,
         file_ids=[],
         total_size=0,
         created_at=datetime.utcnow()
     )
     
-    # Save uploaded files and create file records
-    file_ids = []
-    total_size = 0
-    
-    for upload_file in files:
-        # Generate unique file ID
-        file_id = uuid.uuid4()
-        
-        # Save file to temporary storage
-        file_path = UPLOAD_DIR / f"{file_id}_{upload_file.filename}"
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
-        
-        # Get file size
-        file_size = file_path.stat().st_size
-        total_size += file_size
-        
-        # Create file record
-        file_doc = FilesDoc(
-            id=file_id,
-            filename=upload_file.filename,
-            size=file_size,
-            content_type=upload_file.content_type,
-            uploaded_at=datetime.utcnow(),
-            archive_id=archive_id,
-            state=FileState.UPLOADED,
-            file_path=str(file_path)
-        )
-        
-        await files_collection.upsert(file_doc)
-        file_ids.append(file_id)
+    # Stream uploads straight into the archive and create file records
+    file_docs = []
+    arcnames = set()
+    archive_path = ARCHIVE_DIR / f"archive-{archive_id}.tar.zst"
+    writer = ArchiveWriter(archive_path)
     
-    # Update archive with file IDs
-    archive.file_ids = file_ids
-    archive.total_size = total_size
-    await archives_collection.upsert(archive)
+    try:
+        await writer.open()
+        for upload_file in files:
+            file_size = await writer.add_file(_unique_arcname(upload_file.filename, arcnames), upload_file)
+            
+            # Create file record
+            file_doc = FilesDoc(
+                id=uuid.uuid4(),
+                filename=upload_file.filename,
+                size=file_size,
+                content_type=upload_file.content_type,
+                uploaded_at=datetime.utcnow(),
+                archive_id=archive_id,
+                state=FileState.ARCHIVED
+            )
+            
+            file_docs.append(file_doc)
+        archive_size = await writer.close()
+
+        await files_collection.upsert_many(file_docs)
+
+        # Update archive with file IDs and results
+        archive.state = ArchiveState.COMPLETED
+        archive.file_ids = [file_doc.id for file_doc in file_docs]
+        archive.archive_path = str(archive_path)
+        archive.total_size = archive_size
+        archive.completed_at = datetime.utcnow()
+        archive.download_url = f"/archives/{archive_id}/download"
+        await archives_collection.upsert(archive)
+    except Exception as e:
+        logger.error(f"Failed to create archive {archive_id}: {e}")
+        # Also removes the finished archive if recording it failed
+        await writer.abort()
+        raise HTTPException(status_code=500, detail="Failed to create archive")
+    _invalidate_lists()
     
-    # Start background compression task
-    asyncio.create_task(process_archive(archive_id, files_collection, archives_collection))
+    logger.info(f"Archive {archive_id} completed successfully")
     
     return FileUploadResponse(archive_id=str(archive_id))
 
@@ -247,36 +343,33 @@ async def list_files(request: Request, limit: int = 50, offset: int = 0):
     """
     files_collection, _ = get_collections(request)
     
-    params = FileListParams(limit=limit, offset=offset)
-    files = await files_collection.list(params)
-    
-    return [
-        FileMetadata(
-            id=str(f.id),
-            filename=f.filename,
-            size=f.size,
-            content_type=f.content_type,
-            uploaded_at=f.uploaded_at,
-            archive_id=str(f.archive_id) if f.archive_id else None,
-            state=f.state.value
-        )
-        for f in files
-    ]
+    async def load() -> list:
+        files = await files_collection.list(FileListParams(limit=limit, offset=offset))
+        return [
+            {
+                "id": str(f.id),
+                "filename": f.filename,
+                "size": f.size,
+                "content_type": f.content_type,
+                "uploaded_at": f.uploaded_at,
+                "archive_id": str(f.archive_id) if f.archive_id else None,
+                "state": f.state.value,
+            }
+            for f in files
+        ]
+    
+    # Rows are already in the FileMetadata shape, so skip re-validating them
+    return ORJSONResponse(await _cached_list(("files", limit, offset), load))
 
 
 @router.get("/files/{file_id}", response_model=FileDetailResponse)
-async def get_file(request: Request, file_id: str):
+async def get_file(request: Request, file_id: uuid.UUID):
     """
     Get file details including state, metadata, and download URL if available.
     """
     files_collection, archives_collection = get_collections(request)
     
-    try:
-        file_uuid = uuid.UUID(file_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid file ID format")
-    
-    file_doc = await files_collection.get(file_uuid)
+    file_doc = await files_collection.get(file_id)
     if not file_doc:
         raise HTTPException(status_code=404, detail="File not found")
     
@@ -317,35 +410,32 @@ async def list_archives(request: Request, limit: int = 50, offset: int = 0):
     """
     _, archives_collection = get_collections(request)
     
-    params = ArchiveListParams(limit=limit, offset=offset)
-    archives = await archives_collection.list(params)
+    async def load() -> list:
+        archives = await archives_collection.list(ArchiveListParams(limit=limit, offset=offset))
+        return [
+            {
+                "id": str(a.id),
+                "state": a.state.value,
+                "file_ids": [str(fid) for fid in a.file_ids],
+                "total_size": a.total_size,
+                "created_at": a.created_at,
+                "completed_at": a.completed_at,
+            }
+            for a in archives
+        ]
     
-    return [
-        ArchiveMetadata(
-            id=str(a.id),
-            state=a.state.value,
-            file_ids=[str(fid) for fid in a.file_ids],
-            total_size=a.total_size,
-            created_at=a.created_at,
-            completed_at=a.completed_at
-        )
-        for a in archives
-    ]
+    # Rows are already in the ArchiveMetadata shape, so skip re-validating them
+    return ORJSONResponse(await _cached_list(("archives", limit, offset), load))
 
 
 @router.get("/archives/{archive_id}", response_model=ArchiveDetailResponse)
-async def get_archive(request: Request, archive_id: str):
+async def get_archive(request: Request, archive_id: uuid.UUID):
     """
     Get archive details including state, metadata, and download URL if completed.
     """
     _, archives_collection = get_collections(request)
     
-    try:
-        archive_uuid = uuid.UUID(archive_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid archive ID format")
-    
-    archive = await archives_collection.get(archive_uuid)
+    archive = await archives_collection.get(archive_id)
     if not archive:
         raise HTTPException(status_code=404, detail="Archive not found")
     
@@ -373,19 +463,14 @@ async def get_archive(request: Request, archive_id: str):
 
 
 @router.get("/archives/{archive_id}/download")
-async def download_archive(request: Request, archive_id: str):
+async def download_archive(request: Request, archive_id: uuid.UUID):
     """
     Download the compressed archive.
     Only available if archive is completed.
     """
     _, archives_collection = get_collections(request)
     
-    try:
-        archive_uuid = uuid.UUID(archive_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid archive ID format")
-    
-    archive = await archives_collection.get(archive_uuid)
+    archive = await archives_collection.get(archive_id)
     if not archive:
         raise HTTPException(status_code=404, detail="Archive not found")
     
@@ -405,6 +490,6 @@ async def download_archive(request: Request, archive_id: str):
     
     return FileResponse(
         path=archive_path,
-        media_type="application/gzip",
-        filename=f"archive-{archive_id}.tar.gz"
+        media_type="application/zstd",
+        filename=f"archive-{archive_id}.tar.zst"
     )
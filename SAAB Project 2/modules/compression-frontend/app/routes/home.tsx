@@ -111,7 +111,7 @@ export default function HomePage() {
         const url = window.URL.createObjectURL(blob);
         const a = document.createElement("a");
         a.href = url;
-        a.download = `archive-${archiveId}.tar.gz`;
+        a.download = `archive-${archiveId}.tar.zst`;
         document.body.appendChild(a);
         a.click();
         window.URL.revokeObjectURL(url);
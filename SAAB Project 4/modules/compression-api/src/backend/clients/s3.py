@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import aioboto3
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+# S3 requires every part of a multipart upload except the last to be at least 5 MiB
+MULTIPART_PART_SIZE = 5 * 1024 * 1024
+
+
+@dataclass
+class S3Conf:
+    """S3 (or S3-compatible, e.g. MinIO) configuration"""
+    bucket: str
+    # Left unset to fall back to boto's default credential chain (env, instance role, ...)
+    access_key_id: str | None = None
+    secret_access_key: str | None = None
+    region: str = "us-east-1"
+    endpoint_url: Optional[str] = None  # Set for MinIO and other S3-compatible stores
+
+
+class S3Client:
+    """
+    Object storage client for large blobs such as compressed archives.
+
+    Only initializes if USE_S3 is True in configuration.
+    """
+
+    def __init__(self, config: S3Conf):
+        self._config = config
+        self._session = aioboto3.Session()
+
+    def _client(self):
+        """Open an S3 client; use as an async context manager"""
+        return self._session.client(
+            "s3",
+            endpoint_url=self._config.endpoint_url,
+            aws_access_key_id=self._config.access_key_id,
+            aws_secret_access_key=self._config.secret_access_key,
+            region_name=self._config.region,
+        )
+
+    async def initialize(self):
+        """Create the bucket if it doesn't already exist"""
+        async with self._client() as s3:
+            try:
+                await s3.head_bucket(Bucket=self._config.bucket)
+            except ClientError:
+                logger.info(f"Auto-creating S3 bucket: {self._config.bucket}")
+                create_args = {"Bucket": self._config.bucket}
+                # us-east-1 is the default location and rejects an explicit constraint
+                if self._config.region != "us-east-1":
+                    create_args["CreateBucketConfiguration"] = {"LocationConstraint": self._config.region}
+                await s3.create_bucket(**create_args)
+        logger.info("S3 client initialized")
+
+    async def upload_file(self, key: str, path: Path) -> None:
+        """Upload a local file with a multipart upload, streaming it in MULTIPART_PART_SIZE parts"""
+        bucket = self._config.bucket
+        async with self._client() as s3:
+            upload = await s3.create_multipart_upload(Bucket=bucket, Key=key)
+            upload_id = upload["UploadId"]
+            parts = []
+            try:
+                with open(path, "rb") as fh:
+                    part_number = 1
+                    while chunk := await asyncio.to_thread(fh.read, MULTIPART_PART_SIZE):
+                        part = await s3.upload_part(
+                            Bucket=bucket, Key=key, UploadId=upload_id,
+                            PartNumber=part_number, Body=chunk,
+                        )
+                        parts.append({"PartNumber": part_number, "ETag": part["ETag"]})
+                        part_number += 1
+                await s3.complete_multipart_upload(
+                    Bucket=bucket, Key=key, UploadId=upload_id,
+                    MultipartUpload={"Parts": parts},
+                )
+            except Exception:
+                await s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+                raise
+
+    async def get_download_url(self, key: str, filename: Optional[str] = None, expires_in: int = 3600) -> str:
+        """Get a presigned URL to download an object directly from the store"""
+        params = {"Bucket": self._config.bucket, "Key": key}
+        if filename:
+            params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+        async with self._client() as s3:
+            return await s3.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
@@ -26,6 +26,9 @@ USE_TEMPORAL = True
 # Set to True to enable Twilio SMS functionality
 USE_TWILIO = False
 
+# Set to True to store compressed archives in S3 (or MinIO) instead of on local disk
+USE_S3 = False
+
 #### Types ####
 
 class HttpServerConf(BaseModel):
@@ -179,6 +182,34 @@ TWILIO_FROM_PHONE_NUMBER = EnvVarSpec(
     is_optional=True
 )
 
+## S3 ##
+
+S3_BUCKET = EnvVarSpec(
+    id="S3_BUCKET",
+    default="archives"
+)
+
+S3_ACCESS_KEY_ID = EnvVarSpec(
+    id="S3_ACCESS_KEY_ID",
+    is_optional=True
+)
+
+S3_SECRET_ACCESS_KEY = EnvVarSpec(
+    id="S3_SECRET_ACCESS_KEY",
+    is_optional=True,
+    is_secret=True
+)
+
+S3_REGION = EnvVarSpec(
+    id="S3_REGION",
+    default="us-east-1"
+)
+
+S3_ENDPOINT_URL = EnvVarSpec(
+    id="S3_ENDPOINT_URL",
+    is_optional=True
+)
+
 #### Validation ####
 
 def validate() -> bool:
@@ -236,6 +267,16 @@ def validate() -> bool:
             TWILIO_FROM_PHONE_NUMBER,
         ])
 
+    # Only validate S3 vars if USE_S3 is True
+    if USE_S3:
+        env_vars.extend([
+            S3_BUCKET,
+            S3_ACCESS_KEY_ID,
+            S3_SECRET_ACCESS_KEY,
+            S3_REGION,
+            S3_ENDPOINT_URL,
+        ])
+
     return env.validate(env_vars)
 
 #### Getters ####
@@ -319,3 +360,16 @@ def get_twilio_conf():
         auth_token=env.parse(TWILIO_AUTH_TOKEN),
         from_phone_number=env.parse(TWILIO_FROM_PHONE_NUMBER),
     )
+
+def get_s3_conf():
+    """Get S3 configuration."""
+    # Import here to avoid circular dependency
+    from .clients.s3 import S3Conf
+
+    return S3Conf(
+        bucket=env.parse(S3_BUCKET),
+        access_key_id=env.parse(S3_ACCESS_KEY_ID),
+        secret_access_key=env.parse(S3_SECRET_ACCESS_KEY),
+        region=env.parse(S3_REGION),
+        endpoint_url=env.parse(S3_ENDPOINT_URL),
+    )
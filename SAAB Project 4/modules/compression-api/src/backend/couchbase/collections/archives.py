@@ -2,13 +2,16 @@
 Bindings for working with the 'archives' collection.
 """
 
+import asyncio
 from datetime import datetime, timezone
 from enum import Enum
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from uuid import UUID, uuid4
 
-from ...clients.couchbase import CouchbaseClient
+from couchbase.exceptions import DocumentNotFoundException
+
+from ...clients.couchbase import CouchbaseClient, dump_doc, json_fields
 
 
 # The type used for keys in this collection.
@@ -34,12 +37,16 @@ class ArchivesDoc(BaseModel):
     file_ids: List[UUID] = Field(default_factory=list)  # IDs of files in this archive
     state: ArchiveState = ArchiveState.QUEUED
     size: Optional[int] = None  # Total compressed size in bytes
-    compressed_data: Optional[str] = None  # Base64 encoded compressed data
+    archive_path: Optional[str] = None  # Path to the compressed archive file, when stored on disk
+    object_key: Optional[str] = None  # Key of the compressed archive, when stored in S3
     error_message: Optional[str] = None  # Set when state is FAILED
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
+_JSON_FIELDS = json_fields(ArchivesDoc)
+
+
 class ListParams(BaseModel):
     """Supported parameters for archives list operations."""
     # Add more params here as needed
@@ -53,14 +60,18 @@ class ArchivesCollection:
     def __init__(self, client: CouchbaseClient):
         self._client = client
         self._collection = None
+        self._keyspace = client.get_keyspace(_COLLECTION_NAME)
+        self._init_lock = asyncio.Lock()
 
     ## Utils ##
 
     async def _get_collection(self):
         """Get the collection handle, creating it if necessary."""
         if not self._collection:
-            keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-            self._collection = await self._client.get_collection(keyspace)
+            # Concurrent first callers wait for a single lookup
+            async with self._init_lock:
+                if not self._collection:
+                    self._collection = await self._client.get_collection(self._keyspace)
         return self._collection
 
     ## Initialization ##
@@ -73,9 +84,11 @@ class ArchivesCollection:
 
     async def _get_doc(self, id: _KEY_TYPE) -> dict | None:
         """Retrieves a archives doc as a plain dict."""
-        await self._get_collection()
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        return await self._client.get_document(keyspace, str(id))
+        collection = await self._get_collection()
+        try:
+            return collection.get(str(id)).content_as[dict]
+        except DocumentNotFoundException:
+            return None
 
     async def get(self, id: _KEY_TYPE) -> ArchivesDoc | None:
         """Retrieves a archives doc as a ArchivesDoc."""
@@ -88,8 +101,7 @@ class ArchivesCollection:
     async def _list_rows(self, params: ListParams | None = None) -> list[dict]:
         """Retrieves archives docs as a list of plain dicts."""
         params = params or ListParams()
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        query = self._client.build_list_query(keyspace, limit=params.limit, offset=params.offset)
+        query = self._client.build_list_query(self._keyspace, limit=params.limit, offset=params.offset)
         return await self._client.query_documents(query)
 
     async def list(self, params: ListParams | None = None) -> list[ArchivesDoc]:
@@ -99,11 +111,15 @@ class ArchivesCollection:
 
     async def delete(self, id: _KEY_TYPE) -> bool:
         """Delete a archives doc."""
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        return await self._client.delete_document(keyspace, str(id))
+        collection = await self._get_collection()
+        try:
+            collection.remove(str(id))
+        except DocumentNotFoundException:
+            return False
+        return True
 
     async def upsert(self, doc: ArchivesDoc) -> ArchivesDoc:
         """Insert or update a archives doc."""
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        await self._client.upsert_document(keyspace, str(doc.id), doc.model_dump(mode='json'))
+        collection = await self._get_collection()
+        collection.upsert(str(doc.id), dump_doc(doc, _JSON_FIELDS))
         return doc
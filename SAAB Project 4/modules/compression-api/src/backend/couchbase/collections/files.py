@@ -2,13 +2,16 @@
 Bindings for working with the 'files' collection.
 """
 
+import asyncio
 from datetime import datetime, timezone
 from enum import Enum
 from pydantic import BaseModel, Field
 from typing import Optional
 from uuid import UUID, uuid4
 
-from ...clients.couchbase import CouchbaseClient
+from couchbase.exceptions import DocumentNotFoundException
+
+from ...clients.couchbase import CouchbaseClient, dump_doc, json_fields
 
 
 # The type used for keys in this collection.
@@ -40,6 +43,9 @@ class FilesDoc(BaseModel):
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
+_JSON_FIELDS = json_fields(FilesDoc)
+
+
 class ListParams(BaseModel):
     """Supported parameters for files list operations."""
     # Add more params here as needed
@@ -53,14 +59,18 @@ class FilesCollection:
     def __init__(self, client: CouchbaseClient):
         self._client = client
         self._collection = None
+        self._keyspace = client.get_keyspace(_COLLECTION_NAME)
+        self._init_lock = asyncio.Lock()
 
     ## Utils ##
 
     async def _get_collection(self):
         """Get the collection handle, creating it if necessary."""
         if not self._collection:
-            keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-            self._collection = await self._client.get_collection(keyspace)
+            # Concurrent first callers wait for a single lookup
+            async with self._init_lock:
+                if not self._collection:
+                    self._collection = await self._client.get_collection(self._keyspace)
         return self._collection
 
     ## Initialization ##
@@ -73,9 +83,11 @@ class FilesCollection:
 
     async def _get_doc(self, id: _KEY_TYPE) -> dict | None:
         """Retrieves a files doc as a plain dict."""
-        await self._get_collection()
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        return await self._client.get_document(keyspace, str(id))
+        collection = await self._get_collection()
+        try:
+            return collection.get(str(id)).content_as[dict]
+        except DocumentNotFoundException:
+            return None
 
     async def get(self, id: _KEY_TYPE) -> FilesDoc | None:
         """Retrieves a files doc as a FilesDoc."""
@@ -85,11 +97,20 @@ class FilesCollection:
         doc['id'] = id
         return FilesDoc(**doc)
 
+    async def get_many(self, ids: list[_KEY_TYPE]) -> dict[_KEY_TYPE, FilesDoc | None]:
+        """Retrieves several files docs in batched round-trips, mapping missing ids to None."""
+        collection = await self._get_collection()
+        docs = await self._client.get_documents(collection, [str(id) for id in ids])
+        result = {}
+        for id in ids:
+            doc = docs[str(id)]
+            result[id] = FilesDoc(**{**doc, 'id': id}) if doc is not None else None
+        return result
+
     async def _list_rows(self, params: ListParams | None = None) -> list[dict]:
         """Retrieves files docs as a list of plain dicts."""
         params = params or ListParams()
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        query = self._client.build_list_query(keyspace, limit=params.limit, offset=params.offset)
+        query = self._client.build_list_query(self._keyspace, limit=params.limit, offset=params.offset)
         return await self._client.query_documents(query)
 
     async def list(self, params: ListParams | None = None) -> list[FilesDoc]:
@@ -99,11 +120,21 @@ class FilesCollection:
 
     async def delete(self, id: _KEY_TYPE) -> bool:
         """Delete a files doc."""
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        return await self._client.delete_document(keyspace, str(id))
+        collection = await self._get_collection()
+        try:
+            collection.remove(str(id))
+        except DocumentNotFoundException:
+            return False
+        return True
 
     async def upsert(self, doc: FilesDoc) -> FilesDoc:
         """Insert or update a files doc."""
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        await self._client.upsert_document(keyspace, str(doc.id), doc.model_dump(mode='json'))
+        collection = await self._get_collection()
+        collection.upsert(str(doc.id), dump_doc(doc, _JSON_FIELDS))
         return doc
+
+    async def upsert_many(self, docs: list[FilesDoc]) -> list[FilesDoc]:
+        """Insert or update several files docs in batched round-trips."""
+        collection = await self._get_collection()
+        await self._client.upsert_documents(collection, {str(doc.id): dump_doc(doc, _JSON_FIELDS) for doc in docs})
+        return docs
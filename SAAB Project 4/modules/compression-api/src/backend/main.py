@@ -34,10 +34,14 @@ async def lifespan(app: FastAPI):
         app.state.couchbase_client = CouchbaseClient(couchbase_config)
         await app.state.couchbase_client.init_connection()
 
-        # Import and initialize all Couchbase collections
+        # Import and initialize all Couchbase collections, keeping one shared
+        # instance of each so routes and activities don't rebuild them per call
         from .couchbase.collections import COLLECTIONS
+        app.state.couchbase_collections = {}
         for Collection in COLLECTIONS:
-            await Collection(app.state.couchbase_client).initialize()
+            collection = Collection(app.state.couchbase_client)
+            await collection.initialize()
+            app.state.couchbase_collections[Collection] = collection
 
 
     # Initialize auth client if enabled
@@ -67,6 +71,13 @@ async def lifespan(app: FastAPI):
         await app.state.twilio_client.initialize()
         await app.state.twilio_client.init_connection()
 
+    # Initialize S3 client if enabled
+    if conf.USE_S3:
+        from .clients.s3 import S3Client
+        s3_config = conf.get_s3_conf()
+        app.state.s3_client = S3Client(s3_config)
+        await app.state.s3_client.initialize()
+
     yield
 
     # Clean up PostgreSQL client if enabled
@@ -114,6 +125,7 @@ def main() -> None:
         host=http_conf.host,
         port=http_conf.port,
         reload=http_conf.autoreload,
+        loop="uvloop",  # Installed by uvicorn[standard]; fail loudly rather than fall back to asyncio
         log_level="info",
         log_config=None
     )
@@ -487,9 +487,7 @@ async def create_file(request: Request, file_request: FileCreateRequest):
     """Create a new file record."""
     from ..couchbase.collections.files import FilesCollection, FilesDoc, FileState
     
-    client = request.app.state.couchbase_client
-    files_collection = FilesCollection(client)
-    await files_collection.initialize()
+    files_collection = request.app.state.couchbase_collections[FilesCollection]
     
     file_doc = FilesDoc(
         filename=file_request.filename,
@@ -517,9 +515,7 @@ async def get_file(request: Request, file_id: UUID):
     """Get a file by ID."""
     from ..couchbase.collections.files import FilesCollection
     
-    client = request.app.state.couchbase_client
-    files_collection = FilesCollection(client)
-    await files_collection.initialize()
+    files_collection = request.app.state.couchbase_collections[FilesCollection]
     
     file_doc = await files_collection.get(file_id)
     if not file_doc:
@@ -542,9 +538,7 @@ async def list_files(request: Request, limit: int = 50, offset: int = 0):
     """List all files with pagination."""
     from ..couchbase.collections.files import FilesCollection, ListParams
     
-    client = request.app.state.couchbase_client
-    files_collection = FilesCollection(client)
-    await files_collection.initialize()
+    files_collection = request.app.state.couchbase_collections[FilesCollection]
     
     params = ListParams(limit=limit, offset=offset)
     file_docs = await files_collection.list(params)
@@ -574,18 +568,15 @@ async def create_archive(request: Request, archive_request: ArchiveCreateRequest
     
     # Validate that files exist
     from ..couchbase.collections.files import FilesCollection
-    client = request.app.state.couchbase_client
-    files_collection = FilesCollection(client)
-    await files_collection.initialize()
+    files_collection = request.app.state.couchbase_collections[FilesCollection]
     
-    for file_id in archive_request.file_ids:
-        file_doc = await files_collection.get(file_id)
+    file_docs = await files_collection.get_many(archive_request.file_ids)
+    for file_id, file_doc in file_docs.items():
         if not file_doc:
             raise HTTPException(status_code=404, detail=f"File {file_id} not found")
     
     # Create archive record
-    archives_collection = ArchivesCollection(client)
-    await archives_collection.initialize()
+    archives_collection = request.app.state.couchbase_collections[ArchivesCollection]
     
     archive_doc = ArchivesDoc(
         name=archive_request.name,
@@ -622,9 +613,7 @@ async def get_archive(request: Request, archive_id: UUID):
     """Get an archive by ID."""
     from ..couchbase.collections.archives import ArchivesCollection
     
-    client = request.app.state.couchbase_client
-    archives_collection = ArchivesCollection(client)
-    await archives_collection.initialize()
+    archives_collection = request.app.state.couchbase_collections[ArchivesCollection]
     
     archive_doc = await archives_collection.get(archive_id)
     if not archive_doc:
@@ -646,9 +635,7 @@ async def list_archives(request: Request, limit: int = 50, offset: int = 0):
     """List all archives with pagination."""
     from ..couchbase.collections.archives import ArchivesCollection, ListParams
     
-    client = request.app.state.couchbase_client
-    archives_collection = ArchivesCollection(client)
-    await archives_collection.initialize()
+    archives_collection = request.app.state.couchbase_collections[ArchivesCollection]
     
     params = ListParams(limit=limit, offset=offset)
     archive_docs = await archives_collection.list(params)
@@ -671,13 +658,10 @@ async def list_archives(request: Request, limit: int = 50, offset: int = 0):
 async def download_archive(request: Request, archive_id: UUID):
     """Download an archive's compressed data."""
     from ..couchbase.collections.archives import ArchivesCollection, ArchiveState
-    from fastapi.responses import Response
+    from fastapi import responses
     from datetime import timezone
-    import base64
     
-    client = request.app.state.couchbase_client
-    archives_collection = ArchivesCollection(client)
-    await archives_collection.initialize()
+    archives_collection = request.app.state.couchbase_collections[ArchivesCollection]
     
     archive_doc = await archives_collection.get(archive_id)
     if not archive_doc:
@@ -689,7 +673,8 @@ async def download_archive(request: Request, archive_id: UUID):
             detail=f"Archive is not ready for download. Current state: {archive_doc.state.value}"
         )
     
-    if not archive_doc.compressed_data:
+    stored_in_s3 = bool(archive_doc.object_key)
+    if not stored_in_s3 and (not archive_doc.archive_path or not Path(archive_doc.archive_path).exists()):
         raise HTTPException(status_code=404, detail="Archive data not found")
     
     # Update state to DOWNLOADING
@@ -697,18 +682,20 @@ async def download_archive(request: Request, archive_id: UUID):
     archive_doc.updated_at = datetime.now(timezone.utc)
     await archives_collection.upsert(archive_doc)
     
-    # Decode compressed data
-    compressed_data = base64.b64decode(archive_doc.compressed_data)
-    
     # Update state back to IDLE after download starts
     archive_doc.state = ArchiveState.IDLE
     archive_doc.updated_at = datetime.now(timezone.utc)
     await archives_collection.upsert(archive_doc)
     
-    return Response(
-        content=compressed_data,
+    # Let the client fetch the archive straight from the blob store
+    if stored_in_s3:
+        download_url = await request.app.state.s3_client.get_download_url(
+            archive_doc.object_key, filename=f"{archive_doc.name}.zip"
+        )
+        return responses.RedirectResponse(url=download_url, status_code=302)
+    
+    return responses.FileResponse(
+        path=archive_doc.archive_path,
         media_type="application/zip",
-        headers={
-            "Content-Disposition": f"attachment; filename={archive_doc.name}.zip"
-        }
+        filename=f"{archive_doc.name}.zip",
     )
@@ -12,7 +12,9 @@ from .examples import GreetingWorkflow, compose_greeting
 from .compression_workflows import (
     FileCompressionWorkflow,
     update_file_state,
+    update_file_states_bulk,
     update_archive_state,
+    mark_archive_and_files_failed,
     compress_files,
     mark_files_as_archived,
     delete_files,
@@ -28,7 +30,9 @@ WORKFLOWS = [
 ACTIVITIES = [
     compose_greeting,
     update_file_state,
+    update_file_states_bulk,
     update_archive_state,
+    mark_archive_and_files_failed,
     compress_files,
     mark_files_as_archived,
     delete_files,
@@ -2,10 +2,9 @@
 Temporal workflows for file compression and state management.
 """
 
-import base64
-import io
 import zipfile
 from datetime import timedelta
+from pathlib import Path
 from typing import List
 from uuid import UUID
 
@@ -15,6 +14,16 @@ from temporalio.common import RetryPolicy
 from ..couchbase.collections.files import FileState, FilesDoc
 from ..couchbase.collections.archives import ArchiveState, ArchivesDoc
 
+# Compressed archives are written here; only the path is stored in Couchbase
+ARCHIVE_DIR = Path("/tmp/compression-archives")
+
+# Write buffer for streaming archives to disk
+ARCHIVE_WRITE_BUFFER_SIZE = 1 << 20  # 1 MiB
+
+# Deflate level for archives; 3 keeps most of the ratio of zlib's default (6)
+# at a fraction of the CPU time
+ZIP_COMPRESS_LEVEL = 3
+
 
 # Activities
 
@@ -26,9 +35,7 @@ async def update_file_state(file_id: str, state: str, error_message: str = None)
     from ..couchbase.collections.files import FilesCollection
     from datetime import datetime, timezone
 
-    client = app.state.couchbase_client
-    files_collection = FilesCollection(client)
-    await files_collection.initialize()
+    files_collection = app.state.couchbase_collections[FilesCollection]
 
     file_doc = await files_collection.get(UUID(file_id))
     if file_doc:
@@ -39,6 +46,26 @@ async def update_file_state(file_id: str, state: str, error_message: str = None)
         await files_collection.upsert(file_doc)
 
 
+@activity.defn
+async def update_file_states_bulk(file_ids: List[str], state: str, error_message: str = None) -> None:
+    """Update the state of many files in Couchbase with one batched read and write."""
+    from ..main import app
+    from ..couchbase.collections.files import FilesCollection
+    from datetime import datetime, timezone
+
+    files_collection = app.state.couchbase_collections[FilesCollection]
+
+    file_docs = await files_collection.get_many([UUID(file_id_str) for file_id_str in file_ids])
+    file_docs = [file_doc for file_doc in file_docs.values() if file_doc]
+    now = datetime.now(timezone.utc)
+    for file_doc in file_docs:
+        file_doc.state = FileState(state)
+        file_doc.updated_at = now
+        if error_message:
+            file_doc.error_message = error_message
+    await files_collection.upsert_many(file_docs)
+
+
 @activity.defn
 async def update_archive_state(archive_id: str, state: str, error_message: str = None) -> None:
     """Update the state of an archive in Couchbase."""
@@ -46,9 +73,7 @@ async def update_archive_state(archive_id: str, state: str, error_message: str =
     from ..couchbase.collections.archives import ArchivesCollection
     from datetime import datetime, timezone
 
-    client = app.state.couchbase_client
-    archives_collection = ArchivesCollection(client)
-    await archives_collection.initialize()
+    archives_collection = app.state.couchbase_collections[ArchivesCollection]
 
     archive_doc = await archives_collection.get(UUID(archive_id))
     if archive_doc:
@@ -59,40 +84,50 @@ async def update_archive_state(archive_id: str, state: str, error_message: str =
         await archives_collection.upsert(archive_doc)
 
 
+@activity.defn
+async def mark_archive_and_files_failed(archive_id: str, file_ids: List[str], error_message: str) -> None:
+    """Mark an archive and all of its files as failed in one activity."""
+    await update_archive_state(archive_id, ArchiveState.FAILED.value, error_message)
+    await update_file_states_bulk(file_ids, FileState.FAILED.value, error_message)
+
+
 @activity.defn
 async def compress_files(file_ids: List[str], archive_id: str) -> dict:
     """Compress multiple files into a single archive."""
+    from .. import conf
     from ..main import app
     from ..couchbase.collections.files import FilesCollection
     from ..couchbase.collections.archives import ArchivesCollection
 
-    client = app.state.couchbase_client
-    files_collection = FilesCollection(client)
-    archives_collection = ArchivesCollection(client)
-    await files_collection.initialize()
-    await archives_collection.initialize()
-
-    # Create zip file in memory
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for file_id_str in file_ids:
-            file_doc = await files_collection.get(UUID(file_id_str))
-            if file_doc:
-                # In a real implementation, you'd retrieve actual file content
-                # For now, we'll create a placeholder entry
-                file_content = f"Content of {file_doc.filename}"
-                zip_file.writestr(file_doc.filename, file_content)
-
-    # Get compressed data
-    zip_buffer.seek(0)
-    compressed_data = zip_buffer.read()
-    compressed_size = len(compressed_data)
-    encoded_data = base64.b64encode(compressed_data).decode('utf-8')
-
-    # Update archive with compressed data
+    files_collection = app.state.couchbase_collections[FilesCollection]
+    archives_collection = app.state.couchbase_collections[ArchivesCollection]
+
+    # Stream the zip file straight to disk
+    file_docs = await files_collection.get_many([UUID(file_id_str) for file_id_str in file_ids])
+    archive_path = ARCHIVE_DIR / f"archive-{archive_id}.zip"
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(archive_path, "wb", buffering=ARCHIVE_WRITE_BUFFER_SIZE) as archive_file:
+        with zipfile.ZipFile(archive_file, 'w', zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESS_LEVEL) as zip_file:
+            for file_doc in file_docs.values():
+                if file_doc:
+                    # In a real implementation, you'd retrieve actual file content
+                    # For now, we'll create a placeholder entry
+                    file_content = f"Content of {file_doc.filename}"
+                    zip_file.writestr(file_doc.filename, file_content)
+        compressed_size = archive_file.tell()
+
+    # Move the archive into the blob store when enabled so it doesn't pile up on local disk
+    object_key = None
+    if conf.USE_S3:
+        object_key = f"archives/{archive_id}.zip"
+        await app.state.s3_client.upload_file(object_key, archive_path)
+        archive_path.unlink()
+
+    # Update archive with the location of the compressed data
     archive_doc = await archives_collection.get(UUID(archive_id))
     if archive_doc:
-        archive_doc.compressed_data = encoded_data
+        archive_doc.archive_path = None if object_key else str(archive_path)
+        archive_doc.object_key = object_key
         archive_doc.size = compressed_size
         await archives_collection.upsert(archive_doc)
 
@@ -109,17 +144,15 @@ async def mark_files_as_archived(file_ids: List[str], archive_id: str) -> None:
     from ..couchbase.collections.files import FilesCollection
     from datetime import datetime, timezone
 
-    client = app.state.couchbase_client
-    files_collection = FilesCollection(client)
-    await files_collection.initialize()
+    files_collection = app.state.couchbase_collections[FilesCollection]
 
-    for file_id_str in file_ids:
-        file_doc = await files_collection.get(UUID(file_id_str))
-        if file_doc:
-            file_doc.state = FileState.ARCHIVING
-            file_doc.archive_id = UUID(archive_id)
-            file_doc.updated_at = datetime.now(timezone.utc)
-            await files_collection.upsert(file_doc)
+    file_docs = await files_collection.get_many([UUID(file_id_str) for file_id_str in file_ids])
+    file_docs = [file_doc for file_doc in file_docs.values() if file_doc]
+    for file_doc in file_docs:
+        file_doc.state = FileState.ARCHIVING
+        file_doc.archive_id = UUID(archive_id)
+        file_doc.updated_at = datetime.now(timezone.utc)
+    await files_collection.upsert_many(file_docs)
 
 
 @activity.defn
@@ -129,19 +162,18 @@ async def delete_files(file_ids: List[str]) -> None:
     from ..couchbase.collections.files import FilesCollection
     from datetime import datetime, timezone
 
-    client = app.state.couchbase_client
-    files_collection = FilesCollection(client)
-    await files_collection.initialize()
+    files_collection = app.state.couchbase_collections[FilesCollection]
 
-    for file_id_str in file_ids:
-        file_doc = await files_collection.get(UUID(file_id_str))
-        if file_doc:
-            file_doc.state = FileState.DELETING
-            file_doc.updated_at = datetime.now(timezone.utc)
-            await files_collection.upsert(file_doc)
-            
-            # Actually delete the file
-            await files_collection.delete(UUID(file_id_str))
+    file_docs = await files_collection.get_many([UUID(file_id_str) for file_id_str in file_ids])
+    file_docs = [file_doc for file_doc in file_docs.values() if file_doc]
+    for file_doc in file_docs:
+        file_doc.state = FileState.DELETING
+        file_doc.updated_at = datetime.now(timezone.utc)
+    await files_collection.upsert_many(file_docs)
+
+    # Actually delete the files
+    for file_doc in file_docs:
+        await files_collection.delete(file_doc.id)
 
 
 # Workflows
@@ -219,23 +251,14 @@ class FileCompressionWorkflow:
             }
 
         except Exception as e:
-            # Mark archive as failed
-            await workflow.execute_activity(
-                update_archive_state,
-                args=[archive_id, ArchiveState.FAILED.value, str(e)],
+            # Mark archive and files as failed; a local activity skips the task queue round trip
+            await workflow.execute_local_activity(
+                mark_archive_and_files_failed,
+                args=[archive_id, file_ids, str(e)],
                 start_to_close_timeout=timedelta(seconds=30),
                 retry_policy=retry_policy,
             )
 
-            # Mark files as failed
-            for file_id in file_ids:
-                await workflow.execute_activity(
-                    update_file_state,
-                    args=[file_id, FileState.FAILED.value, str(e)],
-                    start_to_close_timeout=timedelta(seconds=30),
-                    retry_policy=retry_policy,
-                )
-
             return {
                 "status": "failed",
                 "archive_id": archive_id,
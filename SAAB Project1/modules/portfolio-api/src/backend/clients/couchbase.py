@@ -32,6 +32,7 @@ class CouchbaseConf:
     password: str
     bucket: str
     protocol: str = "couchbase"
+    max_concurrency: int = 32  # Max bulk batches in flight at once, across all collections
 
     def get_connection_url(self) -> str:
         """Get the connection URL for Couchbase"""
@@ -90,6 +91,7 @@ class CouchbaseClient:
         self._last_connection_error = None
         self._last_error_log_time = 0
         self._auto_create = auto_create
+        self._op_semaphore = asyncio.Semaphore(config.max_concurrency)
 
     async def init_connection(self):
         """Initialize connection with retry loop - call in background task"""
@@ -143,6 +145,11 @@ class CouchbaseClient:
         await self._await_connected()
         return self._cluster
 
+    @property
+    def op_semaphore(self) -> asyncio.Semaphore:
+        """Bounds the bulk batches in flight on this client; hold it around each batch submission"""
+        return self._op_semaphore
+
     def get_keyspace(
         self,
         collection_name: str,
@@ -265,7 +272,7 @@ class CouchbaseClient:
         """Build standardized list query with proper ID handling"""
         collection_alias = keyspace.collection_name[0]  # Use first letter as alias
         return f"""
-            SELECT META().id as id, {collection_alias}.*
+            SELECT META({collection_alias}).id as id, {collection_alias}.*
             FROM `{keyspace.bucket_name}`.`{keyspace.scope_name}`.`{keyspace.collection_name}` {collection_alias}
             ORDER BY {collection_alias}.{order_by}
             LIMIT {limit} OFFSET {offset}
@@ -277,7 +284,7 @@ class CouchbaseClient:
         collection_alias = keyspace.collection_name[0]  # Use first letter as alias
         limit_clause = f" LIMIT {limit}" if limit else ""
         return f"""
-            SELECT META().id as id, {collection_alias}.*
+            SELECT META({collection_alias}).id as id, {collection_alias}.*
             FROM `{keyspace.bucket_name}`.`{keyspace.scope_name}`.`{keyspace.collection_name}` {collection_alias}
             WHERE {where_clause}
             ORDER BY {collection_alias}.{order_by}{limit_clause}
@@ -296,7 +303,7 @@ class CouchbaseClient:
         where_clause = " OR ".join(conditions)
 
         query = f"""
-            SELECT META().id as id, {collection_alias}.*
+            SELECT META({collection_alias}).id as id, {collection_alias}.*
             FROM `{keyspace.bucket_name}`.`{keyspace.scope_name}`.`{keyspace.collection_name}` {collection_alias}
             WHERE {where_clause}
             ORDER BY {collection_alias}.created_at DESC
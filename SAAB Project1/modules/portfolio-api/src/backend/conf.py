@@ -137,6 +137,13 @@ COUCHBASE_PROTOCOL = EnvVarSpec(
     default="couchbase"
 )
 
+COUCHBASE_MAX_CONCURRENCY = EnvVarSpec(
+    id="COUCHBASE_MAX_CONCURRENCY",
+    parse=int,
+    default="32",
+    type=(int, ...)
+)
+
 ## Temporal ##
 
 TEMPORAL_HOST = EnvVarSpec(
@@ -217,6 +224,7 @@ def validate() -> bool:
             COUCHBASE_PASSWORD,
             COUCHBASE_BUCKET,
             COUCHBASE_PROTOCOL,
+            COUCHBASE_MAX_CONCURRENCY,
         ])
 
     # Only validate Temporal vars if USE_TEMPORAL is True
@@ -295,6 +303,7 @@ def get_couchbase_conf():
         password=env.parse(COUCHBASE_PASSWORD),
         bucket=env.parse(COUCHBASE_BUCKET),
         protocol=env.parse(COUCHBASE_PROTOCOL),
+        max_concurrency=env.parse(COUCHBASE_MAX_CONCURRENCY),
     )
 
 def get_temporal_conf():
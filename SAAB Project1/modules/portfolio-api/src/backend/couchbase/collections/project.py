@@ -2,11 +2,24 @@
 Bindings for working with the 'project' collection.
 """
 
-from pydantic import BaseModel
+import asyncio
+import functools
+import itertools
+from typing import AsyncIterator
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter, model_validator
 from uuid import UUID
 from datetime import date
 
+from couchbase.exceptions import DocumentNotFoundException
+from couchbase.kv_range_scan import RangeScan
+from couchbase.options import QueryOptions, UpsertOptions
+from couchbase.transcoder import RawJSONTranscoder
+
 from ...clients.couchbase import CouchbaseClient
+from ...utils import log
+
+logger = log.get_logger(__name__)
 
 
 # The type used for keys in this collection.
@@ -15,9 +28,17 @@ _KEY_TYPE = UUID
 # The collection name in Couchbase
 _COLLECTION_NAME = "project"
 
+# Default number of docs per get_multi / upsert_multi call in the bulk operations
+_BATCH_SIZE = 50
+
+# Docs are written as JSON already encoded by pydantic, so the SDK doesn't re-encode them
+_RAW_JSON_TRANSCODER = RawJSONTranscoder()
+
 
 class ProjectDoc(BaseModel):
     """Model for project rows."""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
     id: _KEY_TYPE
     title: str
     description: str
@@ -26,11 +47,73 @@ class ProjectDoc(BaseModel):
     finished_at: date | None = None
 
 
+# Validates whole pages of list rows in one pydantic-core call
+_PROJECT_LIST_ADAPTER = TypeAdapter(list[ProjectDoc])
+
+# Pages larger than this are validated on a worker thread so the event loop stays free
+_OFFLOAD_VALIDATION_ROWS = 64
+
+# Rows pulled from the query cursor per worker-thread hop in iter_list
+_STREAM_CHUNK_ROWS = 64
+
+
 class ListParams(BaseModel):
     """Supported parameters for project list operations."""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
     # Add more params here as needed
     limit: int = 50
-    offset: int = 0
+    offset: int = 0  # Deprecated: prefer the after_* cursor, which doesn't scan skipped rows
+    # Keyset cursor: the started_at and id of the last project on the previous page
+    after_started_at: date | None = None
+    after_id: _KEY_TYPE | None = None
+
+    @model_validator(mode='after')
+    def _check_cursor(self) -> 'ListParams':
+        """The cursor needs both halves; one alone would silently restart from page 1."""
+        if (self.after_started_at is None) != (self.after_id is None):
+            raise ValueError("after_started_at and after_id must be given together")
+        return self
+
+
+# The list index is created in the background at startup; failed attempts are
+# retried this many times, with the delay doubling from this many seconds
+_LIST_INDEX_ATTEMPTS = 5
+_LIST_INDEX_RETRY_DELAY = 2
+
+
+def _key(id: _KEY_TYPE | str) -> str:
+    """Document key for an id; ids that are already keys are passed through."""
+    return id if isinstance(id, str) else str(id)
+
+
+async def _validate_rows(rows: list[dict]) -> list[ProjectDoc]:
+    """Validate rows as ProjectDocs, off the event loop for large pages."""
+    if len(rows) > _OFFLOAD_VALIDATION_ROWS:
+        return await asyncio.to_thread(_PROJECT_LIST_ADAPTER.validate_python, rows)
+    return _PROJECT_LIST_ADAPTER.validate_python(rows)
+
+
+@functools.lru_cache(maxsize=16)
+def _list_query_text(bucket_name: str, scope_name: str, collection_name: str, with_cursor: bool) -> str:
+    """
+    N1QL for list queries. Everything that varies per request is a named
+    parameter, so the text stays stable and the server can reuse its prepared plan.
+    """
+    # A predicate on started_at, the index's leading key, lets the planner use the list index
+    where_clause = "p.started_at IS NOT MISSING"
+    if with_cursor:
+        # Seek past the cursor instead of scanning and discarding earlier rows
+        where_clause += """
+              AND (p.started_at > $after_started_at
+                   OR (p.started_at = $after_started_at AND META(p).id > $after_id))"""
+    return f"""
+            SELECT META(p).id as id, p.*
+            FROM `{bucket_name}`.`{scope_name}`.`{collection_name}` p
+            WHERE {where_clause}
+            ORDER BY p.started_at, META(p).id
+            LIMIT $limit OFFSET $offset
+        """
 
 
 class ProjectCollection:
@@ -39,57 +122,203 @@ class ProjectCollection:
     def __init__(self, client: CouchbaseClient):
         self._client = client
         self._collection = None
+        self._keyspace = client.get_keyspace(_COLLECTION_NAME)
+        self._list_index_task = None
 
     ## Utils ##
 
     async def _get_collection(self):
         """Get the collection handle, creating it if necessary."""
         if not self._collection:
-            keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-            self._collection = await self._client.get_collection(keyspace)
+            self._collection = await self._client.get_collection(self._keyspace)
         return self._collection
 
     ## Initialization ##
 
     async def initialize(self):
-        """Creates the collection if it doesn't already exist, and stores a handle to it."""
+        """
+        Creates the collection if it doesn't already exist, and stores a handle to it.
+
+        Also starts creating the list index in the background.
+        """
         await self._get_collection()
+        if self._list_index_task is None:
+            self._list_index_task = asyncio.create_task(self._ensure_list_index())
 
-    ## Operations ##
+    async def _ensure_list_index(self):
+        """
+        Creates the (started_at, id) index that list queries range-scan.
 
-    async def _get_doc(self, id: _KEY_TYPE) -> dict | None:
-        """Retrieves a project doc as a plain dict."""
-        await self._get_collection()
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        return await self._client.get_document(keyspace, str(id))
+        Runs as a background task so neither startup nor requests wait on the
+        build, and the API still serves everything else when the query service
+        is down or index creation isn't permitted. Failures are logged and
+        retried with backoff, up to _LIST_INDEX_ATTEMPTS times.
+        """
+        keyspace = self._keyspace
+        statement = f"""
+            CREATE INDEX IF NOT EXISTS idx_{_COLLECTION_NAME}_started_at_id
+            ON `{keyspace.bucket_name}`.`{keyspace.scope_name}`.`{keyspace.collection_name}`(started_at, META().id)
+        """
+        cluster = await self._client.get_cluster()
+        delay = _LIST_INDEX_RETRY_DELAY
+        for attempt in range(1, _LIST_INDEX_ATTEMPTS + 1):
+            try:
+                # The SDK blocks until the index is built, so keep it off the event loop
+                await asyncio.to_thread(lambda: cluster.query(statement).execute())
+                return
+            except Exception as e:
+                if attempt == _LIST_INDEX_ATTEMPTS:
+                    logger.error(f"Failed to ensure index for {keyspace} after {attempt} attempts: {e}")
+                    return
+                logger.warning(f"Failed to ensure index for {keyspace}, retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+                delay *= 2
 
-    async def get(self, id: _KEY_TYPE) -> ProjectDoc | None:
+    ## Operations ##
+
+    async def get(self, id: _KEY_TYPE | str) -> ProjectDoc | None:
         """Retrieves a project doc as a ProjectDoc."""
-        doc = await self._get_doc(id)
-        if doc is None:
+        collection = await self._get_collection()
+        try:
+            doc = collection.get(_key(id)).content_as[dict]
+        except DocumentNotFoundException:
             return None
         doc['id'] = id
-        return ProjectDoc(**doc)
+        return ProjectDoc.model_validate(doc)
+
+    async def _submit_batch(self, op, batch, **kwargs):
+        """Runs one bulk SDK call on a worker thread, bounded by the client's op semaphore."""
+        async with self._client.op_semaphore:
+            return await asyncio.to_thread(op, batch, **kwargs)
+
+    async def get_many(self, ids: list[_KEY_TYPE | str], batch_size: int = _BATCH_SIZE) -> dict[_KEY_TYPE | str, ProjectDoc | None]:
+        """Retrieves several project docs, batch_size per get_multi call; missing ids map to None."""
+        collection = await self._get_collection()
+        keys = {_key(id): id for id in ids}
+        key_list = list(keys)
+        results = await asyncio.gather(*(
+            self._submit_batch(collection.get_multi, key_list[i:i + batch_size])
+            for i in range(0, len(key_list), batch_size)
+        ))
+        docs = dict.fromkeys(keys.values())
+        for result in results:
+            for error in result.exceptions.values():
+                if not isinstance(error, DocumentNotFoundException):
+                    raise error
+            for key, get_result in result.results.items():
+                # content_as decodes a fresh dict, so id can be set on it in place
+                row = get_result.content_as[dict]
+                row['id'] = keys[key]
+                docs[keys[key]] = ProjectDoc.model_validate(row)
+        return docs
+
+    def _list_query(self, params: ListParams) -> tuple[str, dict]:
+        """Builds the list query and its named parameters, ordered by started_at then id."""
+        keyspace = self._keyspace
+        with_cursor = params.after_id is not None
+        query = _list_query_text(keyspace.bucket_name, keyspace.scope_name, keyspace.collection_name, with_cursor)
+        named_parameters = {"limit": params.limit, "offset": params.offset}
+        if with_cursor:
+            named_parameters["after_started_at"] = params.after_started_at.isoformat()
+            named_parameters["after_id"] = _key(params.after_id)
+        return query, named_parameters
 
     async def _list_rows(self, params: ListParams | None = None) -> list[dict]:
         """Retrieves project docs as a list of plain dicts."""
-        params = params or ListParams()
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        query = self._client.build_list_query(keyspace, limit=params.limit, offset=params.offset)
-        return await self._client.query_documents(query)
+        query, named_parameters = self._list_query(params or ListParams())
+        return await self._client.query_documents(query, {"named_parameters": named_parameters, "adhoc": False})
+
+    async def iter_list(self, params: ListParams | None = None) -> AsyncIterator[ProjectDoc]:
+        """Streams project docs as ProjectDoc instances without loading the whole page first."""
+        query, named_parameters = self._list_query(params or ListParams())
+        cluster = await self._client.get_cluster()
+        rows = iter(cluster.query(query, QueryOptions(named_parameters=named_parameters, adhoc=False)))
+        # The SDK cursor blocks while it waits for rows, so read it on a worker thread
+        while chunk := await asyncio.to_thread(list, itertools.islice(rows, _STREAM_CHUNK_ROWS)):
+            for row in chunk:
+                yield ProjectDoc.model_validate(row)
 
     async def list(self, params: ListParams | None = None) -> list[ProjectDoc]:
-        """Retrieves a list of project docs as ProjectDoc instances."""
+        """
+        Retrieves a list of project docs as ProjectDoc instances.
+
+        To get the next page, pass the started_at and id of the last doc as
+        after_started_at and after_id.
+        """
         rows = await self._list_rows(params)
-        return [ProjectDoc(**{**row, 'id': row.get('id')}) for row in rows]
+        # Rows already carry id from META(p).id in the query projection
+        return await _validate_rows(rows)
+
+    async def scan(self, limit: int | None = None) -> list[ProjectDoc]:
+        """
+        Retrieves project docs with a KV range scan, bypassing the query service.
+
+        Docs come back in no particular order, so use list() for ordered pages.
+        Requires Couchbase Server 7.6+.
+        """
+        collection = await self._get_collection()
 
-    async def delete(self, id: _KEY_TYPE) -> bool:
+        def scan_rows() -> list[dict]:
+            results = collection.scan(RangeScan())
+            rows = []
+            for result in itertools.islice(results, limit):
+                row = result.content_as[dict]
+                row['id'] = result.id
+                rows.append(row)
+            if limit is not None and len(rows) == limit:
+                results.cancel_scan()
+            return rows
+
+        # The scan iterator blocks while it waits for KV nodes, so drain it on a worker thread
+        rows = await asyncio.to_thread(scan_rows)
+        return await _validate_rows(rows)
+
+    async def delete(self, id: _KEY_TYPE | str) -> bool:
         """Delete a project doc."""
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        return await self._client.delete_document(keyspace, str(id))
+        collection = await self._get_collection()
+        try:
+            collection.remove(_key(id))
+        except DocumentNotFoundException:
+            return False
+        return True
+
+    async def delete_many(self, ids: list[_KEY_TYPE | str], batch_size: int = _BATCH_SIZE) -> dict[_KEY_TYPE | str, bool]:
+        """Delete several project docs, batch_size per remove_multi call; maps each id to whether it existed."""
+        collection = await self._get_collection()
+        keys = {_key(id): id for id in ids}
+        key_list = list(keys)
+        results = await asyncio.gather(*(
+            self._submit_batch(collection.remove_multi, key_list[i:i + batch_size])
+            for i in range(0, len(key_list), batch_size)
+        ))
+        deleted = dict.fromkeys(keys.values(), False)
+        for result in results:
+            for error in result.exceptions.values():
+                if not isinstance(error, DocumentNotFoundException):
+                    raise error
+            for key in result.results:
+                deleted[keys[key]] = True
+        return deleted
 
     async def upsert(self, doc: ProjectDoc) -> ProjectDoc:
         """Insert or update a project doc."""
-        keyspace = self._client.get_keyspace(_COLLECTION_NAME)
-        await self._client.upsert_document(keyspace, str(doc.id), doc.model_dump(mode='json'))
+        collection = await self._get_collection()
+        collection.upsert(_key(doc.id), doc.model_dump_json(), UpsertOptions(transcoder=_RAW_JSON_TRANSCODER))
         return doc
+
+    async def upsert_many(self, docs: list[ProjectDoc], batch_size: int = _BATCH_SIZE) -> list[ProjectDoc]:
+        """Insert or update several project docs, batch_size docs per upsert_multi call."""
+        collection = await self._get_collection()
+        batches = [
+            {_key(doc.id): doc.model_dump_json() for doc in docs[i:i + batch_size]}
+            for i in range(0, len(docs), batch_size)
+        ]
+        # The SDK is synchronous, so run the batches on threads to overlap them
+        results = await asyncio.gather(*(
+            self._submit_batch(collection.upsert_multi, batch, transcoder=_RAW_JSON_TRANSCODER)
+            for batch in batches
+        ))
+        for result in results:
+            if not result.all_ok:
+                raise next(iter(result.exceptions.values()))
+        return docs
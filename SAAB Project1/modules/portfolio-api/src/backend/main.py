@@ -34,10 +34,14 @@ async def lifespan(app: FastAPI):
         app.state.couchbase_client = CouchbaseClient(couchbase_config)
         await app.state.couchbase_client.init_connection()
 
-        # Import and initialize all Couchbase collections
+        # Import and initialize all Couchbase collections, keeping one shared
+        # instance of each so routes don't rebuild them per request
         from .couchbase.collections import COLLECTIONS
+        app.state.couchbase_collections = {}
         for Collection in COLLECTIONS:
-            await Collection(app.state.couchbase_client).initialize()
+            collection = Collection(app.state.couchbase_client)
+            await collection.initialize()
+            app.state.couchbase_collections[Collection] = collection
 
 
     # Initialize auth client if enabled
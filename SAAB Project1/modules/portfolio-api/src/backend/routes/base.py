@@ -3,8 +3,8 @@ import os
 import sys
 import time
 from pathlib import Path
-from typing import Optional, List
-from fastapi import APIRouter, Request, HTTPException, Query
+from typing import Annotated, Optional, List
+from fastapi import APIRouter, Depends, Request, HTTPException, Query
 
 from ..utils import log
 from .. import conf
@@ -47,7 +47,19 @@ async def root():
 
 from ..couchbase.collections.project import ProjectDoc, ProjectCollection, ListParams
 from uuid import uuid4, UUID
-from pydantic import BaseModel
+from datetime import date
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+def get_project_collection(cb: CouchbaseDB, request: Request) -> ProjectCollection:
+    """
+    The ProjectCollection created at startup, shared by all requests.
+
+    Takes CouchbaseDB for its 503 when Couchbase is disabled.
+    """
+    return request.app.state.couchbase_collections[ProjectCollection]
+
+Projects = Annotated[ProjectCollection, Depends(get_project_collection)]
 
 class CreateProjectRequest(BaseModel):
     """Request model for creating a project."""
@@ -67,33 +79,33 @@ class UpdateProjectRequest(BaseModel):
 
 @router.get("/projects", response_model=list[ProjectDoc])
 async def list_projects(
-    cb: CouchbaseDB,
+    collection: Projects,
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    after_started_at: date | None = Query(None, description="started_at of the last project on the previous page"),
+    after_id: UUID | None = Query(None, description="id of the last project on the previous page"),
 ):
-    """List all projects with pagination."""
-    collection = ProjectCollection(cb)
-    await collection.initialize()
-    params = ListParams(limit=limit, offset=offset)
+    """List all projects with pagination, ordered by start date."""
+    try:
+        params = ListParams(limit=limit, offset=offset, after_started_at=after_started_at, after_id=after_id)
+    except ValidationError as e:
+        # Report it like FastAPI's own query validation errors (422)
+        raise RequestValidationError(
+            [{**error, "loc": ("query", *error["loc"])} for error in e.errors(include_url=False)]
+        )
     return await collection.list(params)
 
 @router.get("/projects/{project_id}", response_model=ProjectDoc)
-async def get_project(project_id: UUID, cb: CouchbaseDB):
+async def get_project(project_id: UUID, collection: Projects):
     """Get a specific project by ID."""
-    collection = ProjectCollection(cb)
-    await collection.initialize()
     project = await collection.get(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
 
 @router.post("/projects", response_model=ProjectDoc, status_code=201)
-async def create_project(project_request: CreateProjectRequest, cb: CouchbaseDB):
+async def create_project(project_request: CreateProjectRequest, collection: Projects):
     """Create a new project."""
-    from datetime import date
-    collection = ProjectCollection(cb)
-    await collection.initialize()
-    
     # Parse date strings
     started_at = date.fromisoformat(project_request.started_at)
     finished_at = date.fromisoformat(project_request.finished_at) if project_request.finished_at else None
@@ -110,37 +122,31 @@ async def create_project(project_request: CreateProjectRequest, cb: CouchbaseDB)
     return await collection.upsert(project)
 
 @router.put("/projects/{project_id}", response_model=ProjectDoc)
-async def update_project(project_id: UUID, update_request: UpdateProjectRequest, cb: CouchbaseDB):
+async def update_project(project_id: UUID, update_request: UpdateProjectRequest, collection: Projects):
     """Update an existing project."""
-    from datetime import date
-    collection = ProjectCollection(cb)
-    await collection.initialize()
-    
     # Get existing project
     project = await collection.get(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # Update fields if provided
+    # Update fields if provided (ProjectDoc is frozen, so build an updated copy)
+    updates = {}
     if update_request.title is not None:
-        project.title = update_request.title
+        updates["title"] = update_request.title
     if update_request.description is not None:
-        project.description = update_request.description
+        updates["description"] = update_request.description
     if update_request.skills is not None:
-        project.skills = update_request.skills
+        updates["skills"] = update_request.skills
     if update_request.started_at is not None:
-        project.started_at = date.fromisoformat(update_request.started_at)
+        updates["started_at"] = date.fromisoformat(update_request.started_at)
     if update_request.finished_at is not None:
-        project.finished_at = date.fromisoformat(update_request.finished_at)
+        updates["finished_at"] = date.fromisoformat(update_request.finished_at)
     
-    return await collection.upsert(project)
+    return await collection.upsert(project.model_copy(update=updates))
 
 @router.delete("/projects/{project_id}")
-async def delete_project(project_id: UUID, cb: CouchbaseDB):
+async def delete_project(project_id: UUID, collection: Projects):
     """Delete a project."""
-    collection = ProjectCollection(cb)
-    await collection.initialize()
-    
     success = await collection.delete(project_id)
     if not success:
         raise HTTPException(status_code=404, detail="Project not found")